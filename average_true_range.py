@@ -14,19 +14,18 @@ logic() function:
     Context: Called for every row in the input data.
 
     Input:  account - the account object
-            lookback - the lookback dataframe, containing all data up until this point in time
+            data - dict of full-length column ndarrays, only rows up to today may be read
+            today - integer index of the current bar
 
     Output: none, but the account object will be modified on each call
 '''
 
-def logic(account, lookback): # Logic function to be used for each time interval in backtest 
-    
-    today = len(lookback)-1
+def logic(account, data, today): # Logic function to be used for each time interval in backtest
 
     '''
-    
+
     Develop Logic Here
-    
+
     '''
 
 '''
@@ -51,7 +50,10 @@ def preprocess_data(list_of_stocks):
         df['ATR'] = df['TR'].rolling(training_period).mean() # Get ATR for Training Period
         df['ATR%'] = df["ATR"]/df['close']                   # Calculate % Volatilty based on ATR and CLOSE
     
-        df.to_csv("data/" + stock + "_Processed.csv", index=False) # Save to CSV
+        float_cols = df.select_dtypes('float64').columns
+        df[float_cols] = df[float_cols].astype('float32') # FP32 is ample for these signals and halves the bytes on disk and in memory
+
+        df.to_parquet("data/" + stock + "_Processed.parquet", engine="pyarrow", compression="zstd") # Save to Parquet, far faster to load back than CSV
         list_of_stocks_processed.append(stock + "_Processed")
     return list_of_stocks_processed
 
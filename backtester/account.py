@@ -220,6 +220,29 @@ class Account:
                             position.entry_price, price, trade_fee))
             self.buying_power += position.close(percent, price) - trade_fee
 
+    def close_all(self, price):
+        """
+        Close every open position at the given price in one call.
+
+        Same math and trade records as calling close_position(position, 1,
+        price) on each position, but the list is cleared in one assignment
+        so there are no zero-share leftovers for purge_positions to sweep.
+        The strategies only ever hold one directional bet at a time, so this
+        is their single "flatten the book" statement.
+
+        :param price:
+        :return:
+        """
+        if price < 0:
+            raise ValueError("Error: Current price cannot be negative.")
+        for position in self.positions:
+            trade_fee = min(rnd(price * position.shares * self.fee), 10)
+            self.closed_trades.append(
+                ClosedTrade(position.type_, self.date, position.shares,
+                            position.entry_price, price, trade_fee))
+            self.buying_power += position.close(1, price) - trade_fee
+        self.positions = []
+
     def apply_fee(self, price, type_, direction):
         """
         Apply fee to price by position type & transaction direction
@@ -1,12 +1,8 @@
-from operator import truediv
-from pickle import TRUE
-from turtle import width
 import bokeh.plotting
 import pandas as pd
 import numpy as np
 import warnings
 import time
-import statistics
 
 # Local imorts
 from backtester import account, help_funcs
@@ -36,7 +32,9 @@ class backtest():
 
         :param initial_capital: Starting capital to fund account
         :type initial_capital: float
-        :param logic: A function that will be applied to each lookback period of the data
+        :param logic: A function called as logic(account, data, today) for every bar, where
+                      data maps column names to full-length ndarrays and today is the integer
+                      index of the current bar (only rows up to today may be read)
         :type logic: function
 
         :return: A bactesting simulation
@@ -44,25 +42,37 @@ class backtest():
         """
         # self.tracker = []
         self.account = account.Account(initial_capital)
-        
-        # Enter backtest ---------------------------------------------  
+
+        # Extract every column to a raw ndarray once, so logic() reads scalars with plain
+        # integer indexing instead of going through pandas label lookups on every row.
+        # All float columns are packed into one contiguous float32 matrix, one row per bar,
+        # so every indicator logic() touches for bar t sits on the same cache line; the
+        # extracted "columns" are just views into that matrix.
+        float_cols = [col for col in self.data.columns if self.data[col].dtype.kind == 'f']
+        indicators = np.empty((len(self.data), len(float_cols)), dtype=np.float32, order='C')
+        arrays = {}
+        for j, col in enumerate(float_cols):
+            indicators[:, j] = self.data[col].to_numpy()
+            arrays[col] = indicators[:, j]
+        for col in self.data.columns:
+            if col not in arrays:
+                arrays[col] = self.data[col].to_numpy()
+
+        # Enter backtest ---------------------------------------------
         starttime = time.time()
         
-        # for (index,date,low,high,open,close,volume) in self.data.itertuples(): # Itertuples is faster than iterrows
-        for index, today in self.data.iterrows():
-            
-            # equity = self.account.total_value(close)
-            date = today["date"]
-            equity = self.account.total_value(today['close'])
+        # Drive the loop off the extracted arrays; iterrows materialized a Series per bar
+        dates = arrays['date']
+        closes = arrays['close']
+        for today in range(len(closes)):
+            equity = self.account.total_value(closes[today])
 
             # Update account variables
-            self.account.date = date
-            self.account.equity.append(equity)
-
-            # Execute trading logic
-            lookback = self.data[0:index+1]
+            self.account.date = dates[today]
+            self.account.equity.append(float(equity)) # Plain float, account math may hand back float32 scalars
 
-            logic(self.account, lookback)
+            # Execute trading logic on the full-length arrays, no per-row slicing
+            logic(self.account, arrays, today)
 
             # Cleanup empty positions
             self.account.purge_positions()
@@ -97,7 +107,8 @@ class backtest():
         print("--------------------")
         print("Total Trades : {0}".format(longs + sells + shorts + covers))
         print("\n---------------------------------------")
-        return [round(pc1*100, 2),round(pc2*100, 2),longs,sells,shorts,covers,statistics.stdev(self.account.equity),statistics.stdev([price*self.account.initial_capital/self.data.iloc[0]['open'] for price in self.data['open']]), ]
+        hold_equity = self.data['open'].to_numpy()*(self.account.initial_capital/being_price) # Vectorized, no per-price Python loop
+        return [round(pc1*100, 2),round(pc2*100, 2),longs,sells,shorts,covers,float(np.std(self.account.equity, ddof=1)),float(np.std(hold_equity, ddof=1)), ]
     
     def chart(self, show_trades=False, title="Equity Curve"):
         """Chart results.
@@ -113,7 +124,7 @@ class backtest():
         p.xaxis.axis_label = 'Date'
         p.yaxis.axis_label = 'Equity'
         shares = self.account.initial_capital/self.data.iloc[0]['open']
-        base_equity = [price*shares for price in self.data['open']]     
+        base_equity = self.data['open'].to_numpy()*shares
         p.line(self.data['date'], base_equity, color='#CAD8DE', legend_label='Buy and Hold')
         p.line(self.data['date'], self.account.equity, color='#49516F', legend_label='Strategy')
         p.legend.location = "top_left"
@@ -1,41 +1,25 @@
-from turtle import back
 import pandas as pd
 from backtester import engine
 import multiprocessing as mp
-import time
-from functools import partial
 
 # Function used to backtest each stock
-# Parameters: stock - the name of the stock data csv to be tested
+# Parameters: stock - the name of the processed stock data file to be tested
 #             logic - the logic function to be used
-def backtest_stock(results, stock, logic, chart):
-    lock = mp.Lock() # Lock used to prevent errors with multiprocessing
-    df = pd.read_csv("data/" + stock + ".csv", parse_dates=[0]) # Read the csv file into a dataframe to be tested
-    backtest = engine.backtest(df) # Create a backtest object with the data from the csv
+def backtest_stock(stock, logic, chart):
+    df = pd.read_parquet("data/" + stock + ".parquet") # Read the processed parquet file into a dataframe to be tested, dates come back typed
+    backtest = engine.backtest(df) # Create a backtest object with the data from the file
     backtest.start(1000, logic) # Start the backtest with the provided logic function
-    lock.acquire()
     data = backtest.results() # Get the results of the backtest
     data.extend([stock]) # Add the stock name to the results for easy comparison
-    results.append(data) # Add the results to the list of results
     if chart == True:
         backtest.chart(title=stock + "_results") # Chart the results
-    lock.release()
     return data # Return the results
 
 # Function used to test an array of stocks
-# Parameters: arr - the array of stock data csv's to be tested
+# Parameters: arr - the array of stock data files to be tested
 #             logic - the logic function to be used
 
 def test_array(arr, logic, chart):
-    manager = mp.Manager() # Create a multiprocessing manager
-    results = manager.list() # Create a list to store the results
-    processes = [] 
-    for stock in arr: # For each stock in the array
-        p = mp.Process(target=backtest_stock, args=(results, stock, logic, chart)) # Create a process to backtest each stock
-        processes.append(p) # Add the process to the list of processes
-        p.start() # Start the process
-    for process in processes: 
-        process.join() # Wait for the process to finish
-        processes.remove(process) # Remove the process from the list of processes
-
-    return results # Return the results
\ No newline at end of file
+    with mp.Pool(min(len(arr), mp.cpu_count())) as pool: # One worker per stock, capped at the core count
+        results = pool.starmap(backtest_stock, [(stock, logic, chart) for stock in arr])
+    return results # Return the results
@@ -1,9 +1,9 @@
-from turtle import width
 import pandas as pd
 import time
 import multiprocessing as mp
-import matplotlib 
+from multiprocessing import shared_memory
 import numpy as np
+from numba import njit
 
 # local imports
 from backtester import engine, tester
@@ -17,41 +17,75 @@ buyvariablescale = 1
 stop_standard_deviation = 0.5
 training_period = 20
 
+'''
+make_scan_bands() function:
+    Context: Generates and JIT-compiles the per-bar decision kernel with the window
+    lengths and stop width baked in as literals, so the compiled code carries no
+    parameter loads and numba can constant-fold the warmup checks. One variant is
+    compiled per parameter set and cached, which keeps a grid search from paying
+    recompilation for repeated cells.
+
+    Input:  windows - the three Bollinger window lengths
+            stop_sd - stop zone half-width in standard deviations
+
+    Output: compiled scan_bands(price, bold0..2, bolu0..2, ma0, std0, today) returning
+            a bitmask of signals - bit i: enter long off band i, bit 3+i: enter short
+            off band i, bit 6: price is inside the stop zone (close all positions)
+'''
+_scan_bands_cache = {}
+
+def make_scan_bands(windows, stop_sd):
+    key = (tuple(windows), stop_sd)
+    if key not in _scan_bands_cache:
+        src = "def scan_bands(price, bold0, bold1, bold2, bolu0, bolu1, bolu2, ma0, std0, today):\n"
+        src += "    signals = 0\n"
+        for i, w in enumerate(windows):
+            src += "    if today > {0}:\n".format(w)
+            src += "        if price < bold{0}[today]:\n".format(i)
+            src += "            signals |= {0}\n".format(1 << i)
+            src += "        if price > bolu{0}[today]:\n".format(i)
+            src += "            signals |= {0}\n".format(8 << i)
+        src += "    if abs(price - ma0[today]) < std0[today]*{0}:\n".format(stop_sd)
+        src += "        signals |= 64\n"
+        src += "    return signals\n"
+        namespace = {}
+        exec(src, namespace)
+        _scan_bands_cache[key] = njit(namespace['scan_bands'])
+    return _scan_bands_cache[key]
+
+scan_bands = make_scan_bands(bt, stop_standard_deviation) # Kernel specialized for the module's parameters
+
 '''
 logic() function:
     Context: Called for every row in the input data.
 
     Input:  account - the account object
-            lookback - the lookback dataframe, containing all data up until this point in time
+            data - dict of full-length column ndarrays, only rows up to today may be read
+            today - integer index of the current bar
 
     Output: none, but the account object will be modified on each call
 '''
 
-def logic(account, lookback): # Logic function to be used for each time interval in backtest 
-    today = len(lookback)-1
+def logic(account, data, today): # Logic function to be used for each time interval in backtest
+    price = data['close'][today] # Hoisted once, reused below instead of re-indexing per check
+    signals = scan_bands(price, data['BOLD0'], data['BOLD1'], data['BOLD2'],
+                         data['BOLU0'], data['BOLU1'], data['BOLU2'],
+                         data['MA-TP0'], data['std0'], today)
 
-    for i in [0,1,2]:
-        buyvariable = buyvariablescale*standard_deviations
-        buylongamount = account.buying_power*(1-buyvariable/((lookback["BOLD"+str(i)][today]-lookback['close'][today])+buyvariable))
-        buyshortamount = account.buying_power*(1-buyvariable/((lookback['close'][today]-lookback["BOLU"+str(i)][today])+buyvariable))
+    if(signals & 63): # Only walk the bands when some entry actually fired
+        for i in [0,1,2]:
+            if(account.buying_power <= 0): # Fully deployed, no further entry can fire
+                break
 
-        if(today > bt[i]): # If the lookback is long enough to calculate the Bollinger Bands
+            if(signals & (1 << i)): # If current price is below lower Bollinger Band, enter a long position
+                account.enter_position('long', account.buying_power, price)
 
-            if(lookback['close'][today] < lookback["BOLD"+str(i)][today]): # If current price is below lower Bollinger Band, enter a long position
-                '''for position in account.positions: # Close all current positions
-                    account.close_position(position, 1, lookback['close'][today])'''
+            if(signals & (8 << i)): # If today's price is above the upper Bollinger Band, enter a short position
                 if(account.buying_power > 0):
-                    account.enter_position('long', account.buying_power, lookback['close'][today])
-                    #account.enter_position('long', buylongamount, lookback['close'][today]) # Enter a long position
+                    account.enter_position('short', account.buying_power, price)
 
-            if(lookback['close'][today] > lookback["BOLU"+str(i)][today]): # If today's price is above the upper Bollinger Band, enter a short position
-                if(account.buying_power > 0):
-                    account.enter_position('short', account.buying_power, lookback['close'][today])
-                    #account.enter_position('short', buyshortamount, lookback['close'][today]) # Enter a short position
-        
-    if (lookback['close'][today] < lookback['MA-TP0'][today]+lookback['std0'][today]*stop_standard_deviation and lookback['close'][today] > lookback['MA-TP0'][today]-lookback['std0'][today]*stop_standard_deviation):
-        for position in account.positions: # Close all current positions
-            account.close_position(position, 1, lookback['close'][today])
+    if(signals & 64): # If price has reverted to the tightest band's mean
+        account.close_all(price) # Close all current positions
 
 '''
 preprocess_data() function:
@@ -67,19 +101,202 @@ def preprocess_data(list_of_stocks):
     for stock in list_of_stocks:
         df = pd.read_csv("data/" + stock + ".csv", parse_dates=[0])
         df['TP'] = (df['close'] + df['low'] + df['high'])/3 # Calculate Typical Price
-        
+
+        # One cumulative-sum pass over TP replaces the three independent rolling windows:
+        # the mean and std for any window w fall out of c1/c2 differences in O(N)
+        tp = df['TP'].to_numpy()
+        c1 = np.concatenate(([0.0], np.cumsum(tp)))
+        c2 = np.concatenate(([0.0], np.cumsum(tp*tp)))
+
         for i in [0,1,2]:
-            df['std'+str(i)] = df['TP'].rolling(bt[i]).std() # Calculate Standard Deviation
-            df['MA-TP'+str(i)] = df['TP'].rolling(bt[i]).mean() # Calculate Moving Average of Typical Price
-            df['BOLU'+str(i)] = df['MA-TP'+str(i)] + stdv[i]*df['std'+str(i)] # Calculate Long Upper Bollinger Band
-            df['BOLD'+str(i)] = df['MA-TP'+str(i)] - stdv[i]*df['std'+str(i)] # Calculate Long Lower Bollinger Band
+            w = bt[i]
+            s1 = c1[w:] - c1[:-w] # Rolling sum of TP over window w
+            s2 = c2[w:] - c2[:-w] # Rolling sum of TP^2 over window w
+            mean = np.full(len(tp), np.nan)
+            std = np.full(len(tp), np.nan)
+            mean[w-1:] = s1/w
+            std[w-1:] = np.sqrt(np.maximum((s2 - s1*s1/w)/(w-1), 0.0)) # Sample std, same ddof=1 as pandas rolling
+            df['std'+str(i)] = std # Calculate Standard Deviation
+            df['MA-TP'+str(i)] = mean # Calculate Moving Average of Typical Price
+            df['BOLU'+str(i)] = mean + stdv[i]*std # Calculate Long Upper Bollinger Band
+            df['BOLD'+str(i)] = mean - stdv[i]*std # Calculate Long Lower Bollinger Band
+
+        float_cols = df.select_dtypes('float64').columns
+        df[float_cols] = df[float_cols].astype('float32') # FP32 is ample for these signals and halves the bytes on disk and in memory
 
-        df.to_csv("data/" + stock + "_Processed.csv", index=False) # Save to CSV
+        df.to_parquet("data/" + stock + "_Processed.parquet", engine="pyarrow", compression="zstd") # Save to Parquet, far faster to load back than CSV
         list_of_stocks_processed.append(stock + "_Processed")
     return list_of_stocks_processed
 
+'''
+sweep_kernel() function:
+    Context: Simulates a (window, K) grid of single-band mean-reversion variants in one
+    pass over the bars. Every cell keeps its own buying power and open shares, so the
+    whole grid costs one data sweep instead of one backtest per parameter pair. The
+    account model is the simplified fee-free version of backtester.account, which is
+    plenty for ranking parameter cells.
+
+    Input:  close - close price array
+            ma, std - (N, J) rolling mean/std arrays, one column per window
+            ks - array of band widths in standard deviations
+            stop_sd - stop zone half-width in standard deviations
+            initial_capital - starting buying power per cell
+
+    Output: (J, K) array of final strategy returns in percent
+'''
+@njit(cache=True)
+def sweep_kernel(close, ma, std, ks, stop_sd, initial_capital):
+    n, j_count = ma.shape
+    k_count = len(ks)
+    bp = np.full((j_count, k_count), initial_capital)
+    long_shares = np.zeros((j_count, k_count))
+    short_shares = np.zeros((j_count, k_count))
+    short_entry = np.zeros((j_count, k_count))
+
+    for t in range(n):
+        price = close[t]
+        for j in range(j_count):
+            m = ma[t, j]
+            s = std[t, j]
+            if np.isnan(m):
+                continue
+            for k in range(k_count):
+                if abs(price - m) < s*stop_sd: # Price reverted to the mean, flatten the cell
+                    if long_shares[j, k] > 0.0:
+                        bp[j, k] += long_shares[j, k]*price
+                        long_shares[j, k] = 0.0
+                    if short_shares[j, k] > 0.0:
+                        bp[j, k] += short_shares[j, k]*(2.0*short_entry[j, k] - price)
+                        short_shares[j, k] = 0.0
+                elif price < m - ks[k]*s: # Below the lower band, enter long
+                    if bp[j, k] > 0.0:
+                        long_shares[j, k] += bp[j, k]/price
+                        bp[j, k] = 0.0
+                elif price > m + ks[k]*s: # Above the upper band, enter short
+                    if bp[j, k] > 0.0:
+                        short_shares[j, k] += bp[j, k]/price
+                        short_entry[j, k] = price
+                        bp[j, k] = 0.0
+
+    last = close[n-1] # Mark open positions to market at the final bar
+    equity = bp + long_shares*last + short_shares*(2.0*short_entry - last)
+    return (equity/initial_capital - 1.0)*100.0
+
+'''
+build_sweep_inputs() function:
+    Context: Builds the per-stock inputs for a sweep as one contiguous float32 matrix:
+    column 0 is close, columns 1..J the rolling means and columns J+1..2J the rolling
+    stds, one per window. The rolling stats come out of the same cumulative sums used
+    by preprocess_data. A single flat buffer makes the whole thing trivial to drop
+    into shared memory for parallel sweeps.
+
+    Input:  stock - stock data csv name, located in "data/" folder
+            windows - list of rolling window lengths
+
+    Output: (N, 2*len(windows)+1) float32 array
+'''
+def build_sweep_inputs(stock, windows):
+    df = pd.read_csv("data/" + stock + ".csv", parse_dates=[0])
+    tp = ((df['close'] + df['low'] + df['high'])/3).to_numpy()
+    c1 = np.concatenate(([0.0], np.cumsum(tp)))
+    c2 = np.concatenate(([0.0], np.cumsum(tp*tp)))
+
+    j_count = len(windows)
+    buf = np.full((len(tp), 2*j_count + 1), np.nan, dtype=np.float32)
+    buf[:, 0] = df['close'].to_numpy(dtype=np.float32)
+    for j, w in enumerate(windows):
+        s1 = c1[w:] - c1[:-w]
+        s2 = c2[w:] - c2[:-w]
+        buf[w-1:, 1+j] = s1/w
+        buf[w-1:, 1+j_count+j] = np.sqrt(np.maximum((s2 - s1*s1/w)/(w-1), 0.0))
+    return buf
+
+'''
+sweep_parameters() function:
+    Context: Evaluates the strategy over a whole (window, K) grid for one stock. The
+    rolling stats for every window come out of the same cumulative sums used by
+    preprocess_data, then sweep_kernel walks the bars once for all cells.
+
+    Input:  stock - stock data csv name, located in "data/" folder
+            windows - list of rolling window lengths
+            ks - list of band widths in standard deviations
+
+    Output: (len(windows), len(ks)) array of final strategy returns in percent
+'''
+def sweep_parameters(stock, windows, ks):
+    buf = build_sweep_inputs(stock, windows)
+    j_count = len(windows)
+    return sweep_kernel(buf[:, 0], buf[:, 1:j_count+1], buf[:, j_count+1:],
+                        np.asarray(ks, dtype=np.float32), stop_standard_deviation, 1000.0)
+
+sweep_shared = {} # Worker-side handles to the shared sweep buffer
+
+'''
+attach_sweep_shared() function:
+    Context: Pool initializer for parallel sweeps. Attaches the worker to the sweep
+    buffer the parent placed in shared memory and keeps views of the close/ma/std
+    columns, so workers never re-read or copy the stock data.
+
+    Input:  shm_name - name of the parent's SharedMemory block
+            n - number of bars
+            j_count - number of windows
+
+    Output: void, populates sweep_shared
+'''
+def attach_sweep_shared(shm_name, n, j_count):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    buf = np.ndarray((n, 2*j_count + 1), dtype=np.float32, buffer=shm.buf)
+    sweep_shared['shm'] = shm # Keep the handle alive for the worker's lifetime
+    sweep_shared['close'] = buf[:, 0]
+    sweep_shared['ma'] = buf[:, 1:j_count+1]
+    sweep_shared['std'] = buf[:, j_count+1:]
+
+'''
+sweep_ks_chunk() function:
+    Context: Runs in a pool worker; evaluates the full window grid for its chunk of
+    the K axis against the shared sweep buffer.
+
+    Input: ks_chunk - the band widths this worker is responsible for
+
+    Output: (len(windows), len(ks_chunk)) array of final strategy returns in percent
+'''
+def sweep_ks_chunk(ks_chunk):
+    return sweep_kernel(sweep_shared['close'], sweep_shared['ma'], sweep_shared['std'],
+                        np.asarray(ks_chunk, dtype=np.float32), stop_standard_deviation, 1000.0)
+
+'''
+sweep_parameters_parallel() function:
+    Context: Same grid as sweep_parameters, split across processes. The indicator
+    buffer is copied into shared memory once and every worker attaches to it, so
+    memory stays flat and no worker re-parses the csv.
+
+    Input:  stock - stock data csv name, located in "data/" folder
+            windows - list of rolling window lengths
+            ks - list of band widths in standard deviations
+            workers - process count, defaults to one per K up to the core count
+
+    Output: (len(windows), len(ks)) array of final strategy returns in percent
+'''
+def sweep_parameters_parallel(stock, windows, ks, workers=None):
+    buf = build_sweep_inputs(stock, windows)
+    j_count = len(windows)
+    if workers is None:
+        workers = min(len(ks), mp.cpu_count())
+
+    shm = shared_memory.SharedMemory(create=True, size=buf.nbytes)
+    try:
+        shared = np.ndarray(buf.shape, dtype=np.float32, buffer=shm.buf)
+        shared[:] = buf # One copy in, workers attach instead of reloading
+        chunks = np.array_split(np.asarray(ks, dtype=np.float32), workers)
+        with mp.Pool(workers, initializer=attach_sweep_shared, initargs=(shm.name, len(buf), j_count)) as pool:
+            results = pool.map(sweep_ks_chunk, chunks)
+    finally:
+        shm.close()
+        shm.unlink()
+    return np.concatenate(results, axis=1)
+
 if __name__ == "__main__":
-    # list_of_stocks = ["TSLA_2020-03-01_2022-01-20_1min"] 
+    # list_of_stocks = ["TSLA_2020-03-01_2022-01-20_1min"]
     list_of_stocks = ["TSLA_2020-03-09_2022-01-28_15min", "AAPL_2020-03-24_2022-02-12_15min"] # List of stock data csv's to be tested, located in "data/" folder 
     list_of_stocks_proccessed = preprocess_data(list_of_stocks) # Preprocess the data
     results = tester.test_array(list_of_stocks_proccessed, logic, chart=False) # Run backtest on list of stocks using the logic function
@@ -14,32 +14,34 @@ logic() function:
     Context: Called for every row in the input data.
 
     Input:  account - the account object
-            lookback - the lookback dataframe, containing all data up until this point in time
+            data - dict of full-length column ndarrays, only rows up to today may be read
+            today - integer index of the current bar
 
     Output: none, but the account object will be modified on each call
 '''
 
-def logic(account, lookback): # Logic function to be used for each time interval in backtest 
-    
-    today = len(lookback)-1
+def logic(account, data, today): # Logic function to be used for each time interval in backtest
+
     EXIT_PERCENTILE = 0.5
 
 
     if(today > training_period): # If the lookback is long enough to calculate the Bollinger Bands
+        price = data['close'][today] # Hoisted once, reused below instead of re-indexing per check
+        ibs = data['IBS'][today]
 
-        if (lookback['high'][today] == lookback['DONH'][today]):
+        if (data['high'][today] == data['DONH'][today]):
             if(account.buying_power > 0):
-                account.enter_position('long', account.buying_power, lookback['close'][today]) # Enter a long position
+                account.enter_position('long', account.buying_power, price) # Enter a long position
 
-        if(lookback['low'][today] == lookback['DONL'][today]): # If today's price is above the upper Bollinger Band, enter a short position
+        if(data['low'][today] == data['DONL'][today]): # If today's price is above the upper Bollinger Band, enter a short position
             if(account.buying_power > 0):
-                account.enter_position('short', account.buying_power, lookback['close'][today]) # Enter a short position
-            
+                account.enter_position('short', account.buying_power, price) # Enter a short position
+
         for position in account.positions:
-            if position.type_ =="short" and (lookback['IBS'][today] > EXIT_PERCENTILE):                                                        
-                account.close_position(position, 1, lookback['close'][today])
-            if position.type_ =="long" and (lookback['IBS'][today] < 1 - EXIT_PERCENTILE):                                                        
-                account.close_position(position, 1, lookback['close'][today])
+            if position.type_ =="short" and (ibs > EXIT_PERCENTILE):
+                account.close_position(position, 1, price)
+            if position.type_ =="long" and (ibs < 1 - EXIT_PERCENTILE):
+                account.close_position(position, 1, price)
 
 '''
 preprocess_data() function:
@@ -60,7 +62,10 @@ def preprocess_data(list_of_stocks):
 
         df["IBS"] = (df["close"] - df["low"]) / (df["high"] - df["low"]) # INCLUDE IBS to determine if should exit trade.
         
-        df.to_csv("data/" + stock + "_Processed.csv", index=False) # Save to CSV
+        float_cols = df.select_dtypes('float64').columns
+        df[float_cols] = df[float_cols].astype('float32') # FP32 is ample for these signals and halves the bytes on disk and in memory
+
+        df.to_parquet("data/" + stock + "_Processed.parquet", engine="pyarrow", compression="zstd") # Save to Parquet, far faster to load back than CSV
         list_of_stocks_processed.append(stock + "_Processed")
     return list_of_stocks_processed
 
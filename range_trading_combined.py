@@ -1,10 +1,8 @@
-from re import X
 import pandas as pd
 import numpy as np
 import time
 import multiprocessing as mp
-
-from pyparsing import null_debug_action
+from collections import deque
 
 # local imports
 from backtester import engine, tester
@@ -18,116 +16,125 @@ stop_loss = 1 # How many SDs above/below the range is considered a breakout and
 adx_ranging_threshold = 25 # ADX value below which market is considered to be ranging
 
 range_start = -1 # Global variable (not a parameter!!!) for the starting position of a range
+range_state = {'n': 0, 'sum': 0.0, 'sumsq': 0.0, 'min_deque': deque(), 'max_deque': deque()} # Running stats over the current range
 
 '''
-identify_range() function:
-    Context: Called when the market has been identified to be sideways (the starting point of
-    which is passed as a parameter to the function). Will identify the range within which the
-    market is operating and other related parameters.
+reset_range_state() function:
+    Context: Called whenever the market stops ranging so the running statistics start
+    fresh at the next range.
 
-    Input:  lookback - the lookback dataframe, containing all data up until this point in time
-            start - the date at which the market began drifting sideways
+    Input: none
 
-    Output: a tuple of values representing the lower and upper bound, respectively
+    Output: void
 '''
-def identify_range(lookback, start, today):
-    lower = min(lookback['close'][start:today+1]) - bound_buffer*standard_deviations(lookback['close'][start:today+1])
-    upper = max(lookback['close'][start:today+1]) + bound_buffer*standard_deviations(lookback['close'][start:today+1])
-    buy_signal = lower + enter_position_std*standard_deviations(lookback['close'][start:today+1])
-    sell_signal = upper - enter_position_std*standard_deviations(lookback['close'][start:today+1])
-    stop_loss_lower = lower - stop_loss*standard_deviations(lookback['close'][start:today+1])
-    stop_loss_upper = upper + stop_loss*standard_deviations(lookback['close'][start:today+1])
-
-    return (lower, upper, buy_signal, sell_signal, stop_loss_lower, stop_loss_upper)
+def reset_range_state():
+    range_state['n'] = 0
+    range_state['sum'] = 0.0
+    range_state['sumsq'] = 0.0
+    range_state['min_deque'].clear()
+    range_state['max_deque'].clear()
 
 '''
-exit_positions() function:
-    Context: Called to liquidate all positions currently held.
+update_range_state() function:
+    Context: Called once per ranging bar to fold the latest close into the running
+    sum/sum-of-squares and the monotonic min/max deques (the same rolling-extrema
+    scheme pandas uses internally). Each price pops every entry it dominates before
+    being appended, so the front of each deque is always the current extreme and the
+    amortized cost per bar is O(1). If the left edge of the window ever needs to move,
+    outdated entries just get popped from the front.
 
-    Input: account - the account object upon which to act
+    Input: price - the latest close price
 
     Output: void
 '''
-def exit_positions(account, lookback, today):
-    for position in account.positions:
-        account.close_position(position, 1, lookback['close'][today])
-
-'''
-mean() function:
-    Context: returns the mean of a set of data
-
-    Input: data
+def update_range_state(price):
+    range_state['n'] += 1
+    range_state['sum'] += price
+    range_state['sumsq'] += price*price
 
-    Ouptut: the mean
+    min_deque = range_state['min_deque']
+    while min_deque and min_deque[-1] >= price:
+        min_deque.pop()
+    min_deque.append(price)
 
-def mean(data):
-    return sum(data)/len(data)
+    max_deque = range_state['max_deque']
+    while max_deque and max_deque[-1] <= price:
+        max_deque.pop()
+    max_deque.append(price)
 
-adx() function:
-    Context: returns a number between 0 and 100 representing the average directional index (ADX) of the data at the most recent date.
-
-    Input: lookback - the data, up to the current date
-
-    Output: integer between 0 and 100
+'''
+identify_range() function:
+    Context: Called when the market has been identified to be sideways. Will identify
+    the range within which the market is operating and other related parameters, reading
+    the incrementally maintained statistics in range_state.
 
-def adx(lookback):
-    today = len(lookback) - 1
-    if len(lookback) < 2*training_period + 1:
-        return 100
+    Input: none
 
-    dx_array = []
+    Output: a tuple of values representing the lower and upper bound, respectively
+'''
+def identify_range():
+    n = range_state['n']
+    mean = range_state['sum']/n
+    std = np.sqrt(max(range_state['sumsq']/n - mean*mean, 0.0))
+
+    lower = range_state['min_deque'][0] - bound_buffer*std
+    upper = range_state['max_deque'][0] + bound_buffer*std
+    buy_signal = lower + enter_position_std*std
+    sell_signal = upper - enter_position_std*std
+    stop_loss_lower = lower - stop_loss*std
+    stop_loss_upper = upper + stop_loss*std
 
-    for i in range(training_period):
-        ATR = lookback['ATR'][today-i]
+    return (lower, upper, buy_signal, sell_signal, stop_loss_lower, stop_loss_upper)
 
-        smoothed_plusDM = mean([lookback['high'][today-i-x]-lookback['high'][today-i-1-x] for x in range(training_period)])
-        smoothed_minusDM = mean([lookback['low'][today-i-1-x]-lookback['low'][today-i-x] for x in range(training_period)])
+'''
+exit_positions() function:
+    Context: Called to liquidate all positions currently held.
 
-        plusDI = (smoothed_plusDM / ATR)*100
-        minusDI = (smoothed_minusDM / ATR)*100
-        DX = (abs(plusDI - minusDI)/abs(plusDI + minusDI))*100
-        dx_array.append(DX)
+    Input: account - the account object upon which to act
+           price - the price to liquidate at
 
-    ADX = sum(dx_array) / training_period
-    return ADX
+    Output: void
 '''
+def exit_positions(account, price):
+    account.close_all(price)
 
 '''
 logic() function:
     Context: Called for every row in the input data.
 
     Input:  account - the account object
-            lookback - the lookback dataframe, containing all data up until this point in time
+            data - dict of full-length column ndarrays, only rows up to today may be read
+            today - integer index of the current bar
 
     Output: none, but the account object will be modified on each call
 '''
-def logic(account, lookback): # Logic function to be used for each time training_period in backtest 
-    today = len(lookback)-1
-
+def logic(account, data, today): # Logic function to be used for each time training_period in backtest
     if today + 1 < 2*training_period + 1: # make sure there is enough data for calculations to work
         return
-    
-    ranging = lookback['ADX'][today] < adx_ranging_threshold
+
+    price = data['close'][today] # Hoisted once, reused below instead of re-indexing per check
+
+    ranging = data['ADX'][today] < adx_ranging_threshold
     global range_start
 
     if range_start == -1 and ranging:
         range_start = today
+        reset_range_state()
     elif range_start != -1 and not ranging:
-        exit_positions(account)
+        exit_positions(account, price)
         range_start = -1
 
     if ranging:
-        print("yes")
-        lower, upper, buy_signal, sell_signal, stop_loss_lower, stop_loss_upper = identify_range(lookback, range_start, today)
-        price = lookback['close'][today]
+        update_range_state(price)
+        lower, upper, buy_signal, sell_signal, stop_loss_lower, stop_loss_upper = identify_range()
 
         if price <= stop_loss_lower or price >= stop_loss_upper:
-            exit_positions(account, lookback, today)
+            exit_positions(account, price)
         elif price <= buy_signal:
-            exit_positions(account, lookback, today)
+            exit_positions(account, price)
             account.enter_position('long', account.buying_power, price)
         elif price >= sell_signal:
-            exit_positions(account, lookback, today)
+            exit_positions(account, price)
             account.enter_position('short', account.buying_power, price)
     else:
         range_start = -1
@@ -165,14 +172,18 @@ def preprocess_data(list_of_stocks):
 
         df['smoothed_plusDM']  = df['plusDM'].rolling(training_period).sum()
         df['smoothed_minusDM'] = df['minusDM'].rolling(training_period).sum()
-        
-        df['plusDI']  = df['smoothed_plusDM']  /  df['TR'].rolling(training_period).sum()*100
-        df['minusDI'] = df['smoothed_minusDM'] /  df['TR'].rolling(training_period).sum()*100
+
+        smoothed_TR = df['TR'].rolling(training_period).sum() # Shared by both DIs, only roll once
+        df['plusDI']  = df['smoothed_plusDM']  / smoothed_TR*100
+        df['minusDI'] = df['smoothed_minusDM'] / smoothed_TR*100
         df['DX'] = ((df['plusDI']-df['minusDI']).abs()/(df['plusDI']+df['minusDI']).abs())*100
         
         df['ADX'] = df['DX'].rolling(training_period).mean()
 
-        df.to_csv("data/" + stock + "_Processed.csv", index=False) # Save to CSV
+        float_cols = df.select_dtypes('float64').columns
+        df[float_cols] = df[float_cols].astype('float32') # FP32 is ample for these signals and halves the bytes on disk and in memory
+
+        df.to_parquet("data/" + stock + "_Processed.parquet", engine="pyarrow", compression="zstd") # Save to Parquet, far faster to load back than CSV
         list_of_stocks_processed.append(stock + "_Processed")
     return list_of_stocks_processed
 